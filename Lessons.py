@@ -1,90 +1,209 @@
+import calendar
+import re
 import sqlite3
+import threading
+import time
 import tkinter as tk
+from collections import OrderedDict
+from contextlib import contextmanager
 from tkinter import ttk, messagebox
-from datetime import datetime, date
+from datetime import date, datetime, timedelta
 
 
 DB_FILE = "lezioni.db"
-DATE_FMT = "%Y-%m-%d"
+_ISO_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+
+
+# (expiry timestamp, today's date): valid until the next local midnight
+_today_cache: tuple[float, str] = (0.0, "")
 
 
 def today_iso() -> str:
-    return date.today().strftime(DATE_FMT)
+    global _today_cache
+    expires, value = _today_cache
+    if time.time() < expires:
+        return value
+    today = date.today()
+    value = today.isoformat()
+    midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+    _today_cache = (midnight.timestamp(), value)
+    return value
 
 
 def validate_iso_date(s: str) -> bool:
-    try:
-        datetime.strptime(s.strip(), DATE_FMT)
-        return True
-    except Exception:
+    m = _ISO_RE.match(s.strip())
+    if not m:
         return False
+    y, mo, d = map(int, m.groups())
+    return y >= 1 and 1 <= mo <= 12 and 1 <= d <= calendar.monthrange(y, mo)[1]
 
 
 class LessonsDB:
+    # Fixed SQL: always the same string, so sqlite3 reuses the already prepared statement
+    SQL_INSERT = "INSERT INTO lessons(title, course, day, done) VALUES(?,?,?,?)"
+    SQL_UPDATE = "UPDATE lessons SET title=?, course=?, day=?, done=? WHERE id=?"
+    SQL_DELETE = "DELETE FROM lessons WHERE id=?"
+    SQL_TOGGLE = "UPDATE lessons SET done = CASE done WHEN 0 THEN 1 ELSE 0 END WHERE id=?"
+    SQL_COURSES = "SELECT DISTINCT course FROM lessons ORDER BY course COLLATE NOCASE"
+    # query() rows and the course list in a single execute, told apart by the first column
+    SQL_ROWS_AND_COURSES = (
+        "SELECT 'row' AS kind, * FROM ({rows}) "
+        "UNION ALL "
+        "SELECT 'course', NULL, NULL, course, NULL, NULL FROM (SELECT DISTINCT course FROM lessons) "
+        "ORDER BY 1, 5, 4 COLLATE NOCASE, 6, 2"
+    )
+
+    QUERY_CACHE_SIZE = 32
+
+    SCHEMA_VERSION = 2
+    SCHEMA_DDL = """
+        BEGIN;
+        CREATE TABLE IF NOT EXISTS lessons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            course TEXT NOT NULL,
+            day TEXT NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        -- Same order as query()'s ORDER BY: no in-memory sort.
+        -- It has day as prefix, so it replaces the old index on day.
+        DROP INDEX IF EXISTS idx_lessons_day;
+        CREATE INDEX IF NOT EXISTS idx_lessons_day_course_done_id
+            ON lessons(day, course COLLATE NOCASE, done, id);
+        CREATE INDEX IF NOT EXISTS idx_lessons_course ON lessons(course);
+        -- We only ever filter on done = 0: a partial index is enough and much smaller
+        DROP INDEX IF EXISTS idx_lessons_done;
+        CREATE INDEX IF NOT EXISTS idx_lessons_undone
+            ON lessons(day, course COLLATE NOCASE, id) WHERE done = 0;
+        -- Statistics for the query planner
+        ANALYZE;
+        PRAGMA user_version = 2;
+        COMMIT;
+    """
+
     def __init__(self, path: str):
         self.path = path
-        self.conn = sqlite3.connect(self.path)
-        self.conn.row_factory = sqlite3.Row
+        # isolation_level=None: autocommit, transactions are opened explicitly in transaction()
+        # check_same_thread=False: SELECTs run in a worker thread, access is serialized by _lock
+        self.conn = sqlite3.connect(
+            self.path, cached_statements=256, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.RLock()
+        # Memoized course list, cleared by writes that can change it
+        self._courses_cache: list[str] | None = None
+        # query() results per filter combination (LRU), cleared by every write
+        self._query_cache: OrderedDict[tuple, list] = OrderedDict()
+        # WAL + NORMAL: no fsync on every commit, much faster writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-20000")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self._cur = self.conn.cursor()
         self._init_schema()
 
     def _init_schema(self):
-        cur = self.conn.cursor()
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS lessons (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                course TEXT NOT NULL,
-                day TEXT NOT NULL,
-                done INTEGER NOT NULL DEFAULT 0,
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_day ON lessons(day)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_course ON lessons(course)")
-        cur.execute("CREATE INDEX IF NOT EXISTS idx_lessons_done ON lessons(done)")
-        self.conn.commit()
+        # user_version >= SCHEMA_VERSION: schema already in place, no DDL at startup
+        version = self._cur.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        self.conn.executescript(self.SCHEMA_DDL)
+
+    def _invalidate(self, courses: bool = True):
+        self._query_cache.clear()
+        if courses:
+            self._courses_cache = None
+
+    def invalidate(self):
+        # Another connection (e.g. importa_csv.py) may have written to the file
+        with self._lock:
+            self._invalidate()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._cur
+            except Exception:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
 
     def add_lesson(self, title: str, course: str, day: str, done: int = 0):
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO lessons(title, course, day, done) VALUES(?,?,?,?)",
-            (title.strip(), course.strip(), day.strip(), int(done)),
-        )
-        self.conn.commit()
+        with self._lock:
+            self._cur.execute(self.SQL_INSERT, (title.strip(), course.strip(), day.strip(), int(done)))
+            self._invalidate()
+
+    def add_lessons(self, rows: list[dict]):
+        # Bulk insert: one prepared statement and one commit
+        params = [
+            (r["title"].strip(), r["course"].strip(), r["day"].strip(), int(r.get("done", 0)))
+            for r in rows
+        ]
+        with self.transaction() as cur:
+            cur.executemany(self.SQL_INSERT, params)
+            self._invalidate()
 
     def update_lesson(self, lesson_id: int, title: str, course: str, day: str, done: int):
-        cur = self.conn.cursor()
-        cur.execute(
-            "UPDATE lessons SET title=?, course=?, day=?, done=? WHERE id=?",
-            (title.strip(), course.strip(), day.strip(), int(done), int(lesson_id)),
-        )
-        self.conn.commit()
+        with self._lock:
+            self._cur.execute(
+                self.SQL_UPDATE,
+                (title.strip(), course.strip(), day.strip(), int(done), int(lesson_id)),
+            )
+            self._invalidate()
 
     def delete_lesson(self, lesson_id: int):
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM lessons WHERE id=?", (int(lesson_id),))
-        self.conn.commit()
+        with self._lock:
+            self._cur.execute(self.SQL_DELETE, (int(lesson_id),))
+            self._invalidate()
 
     def toggle_done(self, lesson_id: int):
-        cur = self.conn.cursor()
-        cur.execute("UPDATE lessons SET done = CASE done WHEN 0 THEN 1 ELSE 0 END WHERE id=?", (int(lesson_id),))
-        self.conn.commit()
+        with self._lock:
+            self._cur.execute(self.SQL_TOGGLE, (int(lesson_id),))
+            self._invalidate(courses=False)
+
+    def delete_lessons(self, lesson_ids):
+        with self.transaction() as cur:
+            cur.executemany(self.SQL_DELETE, [(int(i),) for i in lesson_ids])
+            self._invalidate()
+
+    def toggle_done_many(self, lesson_ids):
+        with self.transaction() as cur:
+            cur.executemany(self.SQL_TOGGLE, [(int(i),) for i in lesson_ids])
+            self._invalidate(courses=False)
 
     def list_courses(self):
-        cur = self.conn.cursor()
-        cur.execute("SELECT DISTINCT course FROM lessons ORDER BY course COLLATE NOCASE")
-        return [r["course"] for r in cur.fetchall()]
+        with self._lock:
+            if self._courses_cache is None:
+                self._cur.execute(self.SQL_COURSES)
+                self._courses_cache = [course for (course,) in self._cur.fetchall()]
+            return self._courses_cache
+
+    def query(self, day: str | None, course: str | None, only_undone: bool,
+              limit: int | None = None, offset: int = 0):
+        # Canonical filters: None, "" and "TUTTE" share the same cache key
+        day = (day or "").strip() or "TUTTE"
+        course = (course or "").strip() or "TUTTI"
+        only_undone = bool(only_undone)
+        key = (day, course, only_undone, limit, offset)
+        with self._lock:
+            rows = self._query_cache.get(key)
+            if rows is not None:
+                self._query_cache.move_to_end(key)
+                return rows
 
-    def query(self, day: str | None, course: str | None, only_undone: bool):
         sql = "SELECT id, title, course, day, done FROM lessons"
         where = []
         params = []
 
-        if day and day != "TUTTE":
+        if day != "TUTTE":
             where.append("day = ?")
             params.append(day)
 
-        if course and course != "TUTTI":
+        if course != "TUTTI":
             where.append("course = ?")
             params.append(course)
 
@@ -96,12 +215,37 @@ class LessonsDB:
 
         sql += " ORDER BY day ASC, course COLLATE NOCASE ASC, done ASC, id ASC"
 
-        cur = self.conn.cursor()
-        cur.execute(sql, tuple(params))
-        return cur.fetchall()
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+
+        with self._lock:
+            if self._courses_cache is None:
+                rows = self._query_with_courses(sql, params)
+            else:
+                self._cur.execute(sql, tuple(params))
+                rows = self._cur.fetchall()
+            self._query_cache[key] = rows
+            if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+            return rows
+
+    def _query_with_courses(self, sql, params):
+        # Courses must be reloaded anyway: fetch them with the same query as the rows
+        self._cur.execute(self.SQL_ROWS_AND_COURSES.format(rows=sql), tuple(params))
+        rows = []
+        courses = []
+        for kind, lesson_id, title, course, day, done in self._cur.fetchall():
+            if kind == "row":
+                rows.append((lesson_id, title, course, day, done))
+            else:
+                courses.append(course)
+        self._courses_cache = courses
+        return rows
 
     def close(self):
-        self.conn.close()
+        with self._lock:
+            self.conn.close()
 
 
 class LessonDialog(tk.Toplevel):
@@ -197,6 +341,16 @@ class LessonDialog(tk.Toplevel):
 
 
 class App(tk.Tk):
+    # Inserts a whole batch of rows with a single call across the Python/Tcl bridge.
+    # rows is a flat list: iid values tags iid values tags ...
+    INSERT_ROWS_PROC = """
+        proc ::lessons_insert_rows {tree rows} {
+            foreach {iid values tags} $rows {
+                $tree insert {} end -id $iid -values $values -tags $tags
+            }
+        }
+    """
+
     def __init__(self):
         super().__init__()
         self.title("Recupero Lezioni")
@@ -204,8 +358,27 @@ class App(tk.Tk):
 
         self.db = LessonsDB(DB_FILE)
 
+        # lesson_id -> last values shown (so only the differences get updated).
+        # Each table item uses the lesson id as its iid.
+        self._row_values: dict[int, tuple] = {}
+
+        # Paging: load _page_size rows at a time, the rest arrive while scrolling
+        self._page_size = 200
+        self._offset = 0
+        self._has_more = False
+        self._filters = None
+
+        # Every _load_table bumps _query_seq: only the most recent result is applied
+        self._query_seq = 0
+        self._loading = False
+        self._closing = False
+
+        # Several changes in a row produce a single reload (see _reload_all)
+        self._reload_pending = False
+        # Course list to refresh on the next table load
+        self._courses_dirty = True
+
         self._build_ui()
-        self._refresh_courses()
         self._load_table()
 
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -241,7 +414,7 @@ class App(tk.Tk):
         mid.pack(fill="both", expand=True)
 
         columns = ("day", "course", "title", "done")
-        self.tree = ttk.Treeview(mid, columns=columns, show="headings", selectmode="browse")
+        self.tree = ttk.Treeview(mid, columns=columns, show="headings", selectmode="extended")
         self.tree.heading("day", text="Giorno")
         self.tree.heading("course", text="Corso")
         self.tree.heading("title", text="Lezione")
@@ -252,12 +425,18 @@ class App(tk.Tk):
         self.tree.column("title", width=420, anchor="w")
         self.tree.column("done", width=90, anchor="center")
 
-        vsb = ttk.Scrollbar(mid, orient="vertical", command=self.tree.yview)
+        self.tk.eval(self.INSERT_ROWS_PROC)
+
+        # Optional: slightly differentiate done rows
+        self.tree.tag_configure("done", foreground="#6b7280")  # grey-ish
+        self.tree.tag_configure("todo", foreground="#111827")  # dark
+
+        self.vsb = ttk.Scrollbar(mid, orient="vertical", command=self.tree.yview)
         hsb = ttk.Scrollbar(mid, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(yscrollcommand=self._on_tree_yscroll, xscrollcommand=hsb.set)
 
         self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.vsb.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
 
         mid.rowconfigure(0, weight=1)
@@ -277,7 +456,7 @@ class App(tk.Tk):
 
         ttk.Separator(bot, orient="vertical").pack(side="left", fill="y", padx=12)
 
-        ttk.Button(bot, text="Ricarica", command=self._reload_all).pack(side="left")
+        ttk.Button(bot, text="Ricarica", command=self._reload_from_disk).pack(side="left")
 
         self.status = tk.StringVar(value="")
         ttk.Label(bot, textvariable=self.status).pack(side="right")
@@ -285,9 +464,17 @@ class App(tk.Tk):
     def _set_status(self, msg: str):
         self.status.set(msg)
 
+    def _current_filters(self):
+        day_filter = self.var_day.get().strip() or "TUTTE"
+        course_filter = self.var_course.get().strip() or "TUTTI"
+        return day_filter, course_filter, bool(self.var_only_undone.get())
+
     def _apply_filters(self):
-        day = self.var_day.get().strip()
-        if day != "TUTTE" and day and not validate_iso_date(day):
+        day, course, _ = self._current_filters()
+        # Store the canonical values back, so later reads need no cleanup
+        self.var_day.set(day)
+        self.var_course.set(course)
+        if day != "TUTTE" and not validate_iso_date(day):
             messagebox.showerror("Errore", "Filtro data non valido. Usa YYYY-MM-DD oppure 'TUTTE'.")
             return
         self._load_table()
@@ -308,62 +495,173 @@ class App(tk.Tk):
         self.cb_course.configure(values=values)
         if self.var_course.get() not in values:
             self.var_course.set("TUTTI")
+            return True
+        return False
 
-    def _selected_id(self):
-        sel = self.tree.selection()
-        if not sel:
-            return None
-        item_id = sel[0]
-        return int(self.tree.item(item_id, "values")[0])  # hidden id in first value? (we'll store it separately)
+    def _refresh_courses_if_dirty(self):
+        if self._courses_dirty:
+            self._courses_dirty = False
+            if self._refresh_courses():
+                # The filtered course is gone: the rows just shown belong to a stale filter
+                self._load_table()
+
+    def _selected_ids(self):
+        return [int(i) for i in self.tree.selection()]
 
     def _get_selected_row(self):
         sel = self.tree.selection()
         if not sel:
             return None
-        item = self.tree.item(sel[0])
-        # We store id in tags to avoid showing it: tags=("id:123",)
-        tags = item.get("tags", [])
-        if not tags:
-            return None
-        tag0 = tags[0]
-        if not tag0.startswith("id:"):
-            return None
-        lesson_id = int(tag0.split(":", 1)[1])
-        vals = item.get("values", [])
+        lesson_id = int(sel[0])
+        vals = self.tree.item(sel[0], "values")
         # values are: day, course, title, done_str
         return {"id": lesson_id, "day": vals[0], "course": vals[1], "title": vals[2], "done": 1 if vals[3] == "Fatta" else 0}
 
     def _load_table(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        filters = self._current_filters()
+        if filters[0] != "TUTTE" and not validate_iso_date(filters[0]):
+            # No row can match an invalid date: show an empty table without asking SQLite
+            self._query_seq += 1  # drop any query still in flight
+            self._loading = False
+            self._filters = None
+            self._offset = 0
+            self._has_more = False
+            self.tree.delete(*self.tree.get_children())
+            self._row_values.clear()
+            self._set_status("Filtro data non valido")
+            self._refresh_courses_if_dirty()
+            return
 
-        day_filter = self.var_day.get().strip()
-        if not day_filter:
-            day_filter = "TUTTE"
+        # Same filters (e.g. after an edit): reload what was already scrolled into view
+        limit = self._page_size
+        if filters == self._filters:
+            limit = max(limit, self._offset)
 
-        course_filter = self.var_course.get().strip() or "TUTTI"
-        only_undone = bool(self.var_only_undone.get())
+        self._query_seq += 1
+        self._loading = True
+        self._set_status("Caricamento…")
+        threading.Thread(
+            target=self._bg_query, args=(self._query_seq, filters, limit), daemon=True
+        ).start()
 
-        rows = self.db.query(day_filter, course_filter, only_undone)
+    def _bg_query(self, seq, filters, limit):
+        # Worker thread: only the SELECT runs here, the Treeview is touched in _apply_rows
+        try:
+            rows = self.db.query(*filters, limit=limit, offset=0)
+        except sqlite3.Error as e:
+            callback, args = self._query_failed, (seq, e)
+        else:
+            callback, args = self._apply_rows, (seq, filters, limit, rows)
+        try:
+            self.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            if self._closing:
+                return  # window already closed
+            # Tk could not take the callback: don't leave paging blocked on this load
+            if seq == self._query_seq:
+                self._loading = False
+            raise
+
+    def _query_failed(self, seq, error):
+        if seq != self._query_seq:
+            return
+        self._loading = False
+        self._set_status(f"Errore: {error}")
+
+    def _apply_rows(self, seq, filters, limit, rows):
+        if seq != self._query_seq:
+            return  # a newer query is on its way
+
+        self._loading = False
+        self._filters = filters
+        self._offset = len(rows)
+        self._has_more = len(rows) == limit
+        # Rows are plain tuples in SELECT order: (id, title, course, day, done)
+        new_ids = {r[0] for r in rows}
+
+        # Remove rows that are no longer visible, all in one Tcl call
+        gone = self._row_values.keys() - new_ids
+        if gone:
+            self.tree.delete(*(str(i) for i in gone))
+            for i in gone:
+                del self._row_values[i]
+
+        order = []
+        fresh = []
+        for lesson_id, title, course, day, done in rows:
+            values, tags = self._row_display(day, course, title, done)
+            item = str(lesson_id)
+            old = self._row_values.get(lesson_id)
+            if old is None:
+                fresh.append((item, values, tags))
+            elif old != values:
+                self.tree.item(item, values=values, tags=tags)
+            self._row_values[lesson_id] = values
+            order.append(item)
+        self._insert_rows(fresh)
+
+        # Keep the ORDER BY of the query: reorder only if something moved
+        if list(self.tree.get_children()) != order:
+            self.tree.set_children("", *order)
+
+        self._set_visible_status()
+        self._refresh_courses_if_dirty()
+
+    def _row_display(self, day, course, title, done):
+        values = (day, course, title, "Fatta" if done else "Da fare")
+        tags = ("done" if done else "todo",)
+        return values, tags
+
+    def _insert_rows(self, rows):
+        # rows: (iid, values, tags) triples, appended at the end of the table
+        flat = [x for row in rows for x in row]
+        if flat:
+            self.tk.call("::lessons_insert_rows", str(self.tree), tuple(flat))
+
+    def _set_visible_status(self):
+        more = "+" if self._has_more else ""
+        self._set_status(f"Totale visibili: {self._offset}{more}")
+
+    def _on_tree_yscroll(self, first, last):
+        self.vsb.set(first, last)
+        if float(last) > 0.9:
+            self._fetch_next_page()
+
+    def _fetch_next_page(self):
+        if not self._has_more or self._filters is None or self._loading:
+            return
 
-        for r in rows:
-            done_str = "Fatta" if r["done"] else "Da fare"
-            item = self.tree.insert(
-                "",
-                "end",
-                values=(r["day"], r["course"], r["title"], done_str),
-                tags=(f"id:{r['id']}", "done" if r["done"] else "todo"),
-            )
+        rows = self.db.query(*self._filters, limit=self._page_size, offset=self._offset)
+        self._offset += len(rows)
+        self._has_more = len(rows) == self._page_size
 
-        # Optional: slightly differentiate done rows
-        self.tree.tag_configure("done", foreground="#6b7280")  # grey-ish
-        self.tree.tag_configure("todo", foreground="#111827")  # dark
+        fresh = []
+        for lesson_id, title, course, day, done in rows:
+            if lesson_id in self._row_values:
+                continue
+            values, tags = self._row_display(day, course, title, done)
+            fresh.append((str(lesson_id), values, tags))
+            self._row_values[lesson_id] = values
+        self._insert_rows(fresh)
 
-        self._set_status(f"Totale visibili: {len(rows)}")
-        self._refresh_courses()
+        self._set_visible_status()
 
     def _reload_all(self):
-        self._refresh_courses()
+        if self._reload_pending:
+            return
+        self._reload_pending = True
+        self.after_idle(self._do_reload)
+
+    def _reload_from_disk(self):
+        self.db.invalidate()
+        self._reload_all()
+
+    def _do_reload(self):
+        if not self._reload_pending:
+            return
+        self._reload_pending = False
+        # The courses come back with the table query (see LessonsDB.query)
+        self._courses_dirty = True
         self._load_table()
 
     def _add(self):
@@ -390,26 +688,32 @@ class App(tk.Tk):
         self._reload_all()
 
     def _delete_selected(self):
-        row = self._get_selected_row()
-        if not row:
+        ids = self._selected_ids()
+        if not ids:
             messagebox.showinfo("Info", "Seleziona una lezione dalla tabella.")
             return
 
-        if not messagebox.askyesno("Conferma", f"Eliminare la lezione?\n\n{row['title']} ({row['course']})"):
+        if len(ids) == 1:
+            row = self._get_selected_row()
+            msg = f"Eliminare la lezione?\n\n{row['title']} ({row['course']})"
+        else:
+            msg = f"Eliminare {len(ids)} lezioni?"
+        if not messagebox.askyesno("Conferma", msg):
             return
 
-        self.db.delete_lesson(row["id"])
+        self.db.delete_lessons(ids)
         self._reload_all()
 
     def _toggle_done_selected(self):
-        row = self._get_selected_row()
-        if not row:
+        ids = self._selected_ids()
+        if not ids:
             messagebox.showinfo("Info", "Seleziona una lezione dalla tabella.")
             return
-        self.db.toggle_done(row["id"])
+        self.db.toggle_done_many(ids)
         self._reload_all()
 
     def _on_close(self):
+        self._closing = True
         try:
             self.db.close()
         finally: